@@ -1,13 +1,22 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, abort, g
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask_caching import Cache
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
 import os
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from flask_migrate import Migrate
+from sqlalchemy import event, func, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, load_only
 from dotenv import load_dotenv
 
 load_dotenv() 
@@ -18,7 +27,7 @@ app.secret_key = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-producti
 # Debugging: Prüfe welche Datenbank verwendet wird
 if os.environ.get("DATABASE_URL"):
     database_url = os.environ.get("DATABASE_URL")
-    logging.info(f"✓ DATABASE_URL gefunden: {database_url[:50]}...")
+    logging.info("✓ DATABASE_URL gefunden: %s...", database_url[:50])
     if database_url.startswith("postgres://"):
         database_url = database_url.replace("postgres://", "postgresql://", 1)
     app.config["SQLALCHEMY_DATABASE_URI"] = database_url
@@ -29,8 +38,39 @@ else:
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
     logging.warning("⚠ DATABASE_URL nicht gesetzt - verwende SQLite (Daten gehen nach Deployment verloren!)")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Sessions laufen nach 30 Minuten ab: das Admin-Flag wird aus der signierten
+# Session gelesen (kein SELECT pro Admin-Request), muss dafür aber regelmäßig
+# über einen neuen Login bestätigt werden
+app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(minutes=30)
+
+# Connection-Pool für mehrere Gunicorn-Worker/-Threads; bei SQLite zusätzlich
+# check_same_thread=False, damit Threads Verbindungen aus dem Pool teilen dürfen
+# query_cache_size: großzügiger Cache für kompiliertes SQL, damit auch die
+# Filter-Kombinationen der Startseite ihre Kompilate wiederverwenden
+engine_options = {"pool_size": 10, "max_overflow": 20, "pool_pre_ping": True,
+                  "query_cache_size": 1200}
+if app.config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+    engine_options["connect_args"] = {"check_same_thread": False, "timeout": 15}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options
+
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
+cache = Cache(app, config={"CACHE_TYPE": "SimpleCache"})
+
+# SQLite-Tuning: WAL erlaubt gleichzeitige Leser während ein Schreiber aktiv ist,
+# statt dass jeder Commit alle SELECTs blockiert (Standard-Rollback-Journal)
+_db_uri = app.config["SQLALCHEMY_DATABASE_URI"]
+if _db_uri.startswith("sqlite") and ":memory:" not in _db_uri:
+    with app.app_context():
+        @event.listens_for(db.engine, "connect")
+        def _set_sqlite_pragmas(dbapi_conn, _connection_record):
+            cur = dbapi_conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute("PRAGMA temp_store=MEMORY")
+            cur.execute("PRAGMA mmap_size=268435456")
+            cur.execute("PRAGMA busy_timeout=5000")
+            cur.close()
 
 # Logging 
 if __name__ != "__main__":
@@ -43,11 +83,23 @@ if __name__ != "__main__":
     logging.root.setLevel(gunicorn_logger.level)
 else:
     # Lokale Entwicklung (wenn direkt mit python app.py gestartet)
-    logging.basicConfig(level=logging.INFO)
+    logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"))
 
 # TMDb API Key aus environment variable
 TMDB_API_KEY = os.environ.get("TMDB_API_KEY")
 
+# Vorab kompiliert, damit nicht jeder /add-Request durch re.compile läuft
+_TMDB_URL_RE = re.compile(r'/movie/(\d+)')
+
+# Gemeinsame HTTP-Session für TMDb: hält die TLS-Verbindung per Keep-Alive
+# offen (spart Handshake pro Request) und wiederholt transiente Fehler
+_tmdb_session = requests.Session()
+_tmdb_session.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504])
+))
+
 # Domain Redirect Middleware
 @app.before_request
 def redirect_to_custom_domain():
@@ -55,28 +107,66 @@ def redirect_to_custom_domain():
     if request.host == 'dvhs-production.up.railway.app':
         return redirect(f'https://dvhs.12bft.de{request.full_path.rstrip("?")}', code=301)
 
+@app.before_request
+def lade_aktuellen_benutzer():
+    """Lädt den eingeloggten Benutzer einmal pro Request in g.
+
+    Decorators, context processor und Routen greifen danach auf g.user
+    zu, statt jeweils einen eigenen SELECT abzusetzen.
+    """
+    benutzer_id = session.get("benutzer_id")
+    g.user = db.session.get(Benutzer, benutzer_id) if benutzer_id else None
+
 # Model
+# Verknüpfungstabelle Film <-> Genre
+film_genres = db.Table(
+    'film_genres',
+    db.Column('film_id', db.Integer, db.ForeignKey('film.id'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genre.id'), primary_key=True),
+    db.Index('ix_fg_genre_film', 'genre_id', 'film_id'),
+)
+
+class Genre(db.Model):
+    """Normalisierte Genres statt der alten Komma-Liste auf Film.genres"""
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<Genre {self.name}>'
+
 class Film(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
-    year = db.Column(db.Integer)
+    year = db.Column(db.Integer, index=True)
     beschreibung = db.Column(db.Text)
-    tmdb_id = db.Column(db.String(20))
+    tmdb_id = db.Column(db.String(20), index=True, unique=True)
     poster_url = db.Column(db.String(500))
-    besitzer = db.Column(db.String(100))
-    verliehen_an = db.Column(db.String(100))
+    besitzer = db.Column(db.String(100), index=True)
+    verliehen_an = db.Column(db.String(100), index=True)
     verliehen_seit = db.Column(db.DateTime)
-    genres = db.Column(db.String(500))  # Komma-separierte Liste von Genres
-    wunschliste = db.Column(db.Boolean, default=True)
+    # selectin: lädt Genres für N Filme mit einem zweiten SELECT statt
+    # die Filmzeilen über einen JOIN zu vervielfachen
+    genres = db.relationship('Genre', secondary=film_genres, lazy='selectin', order_by='Genre.name')
+    wunschliste = db.Column(db.Boolean, default=True, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Kombinierter Index für die Besitzer+Jahr-Filter auf der Startseite
+    __table_args__ = (db.Index('ix_film_besitzer_year', 'besitzer', 'year'),)
+
 class LendingRequest(db.Model):
     """Modell für Film-Ausleih-Anfragen"""
     id = db.Column(db.Integer, primary_key=True)
-    borrower_id = db.Column(db.Integer, db.ForeignKey('benutzer.id'), nullable=False)  # Wer möchte leihen?
-    owner_id = db.Column(db.Integer, db.ForeignKey('benutzer.id'), nullable=False)      # Wer besitzt den Film?
-    film_id = db.Column(db.Integer, db.ForeignKey('film.id'), nullable=False)           # Welcher Film?
-    
+    borrower_id = db.Column(db.Integer, db.ForeignKey('benutzer.id'), nullable=False, index=True)  # Wer möchte leihen?
+    owner_id = db.Column(db.Integer, db.ForeignKey('benutzer.id'), nullable=False, index=True)      # Wer besitzt den Film?
+    film_id = db.Column(db.Integer, db.ForeignKey('film.id'), nullable=False, index=True)           # Welcher Film?
+
+    # Kombinierter Index für das Leihboard (Anfragen an einen Besitzer je Film);
+    # der UNIQUE-Constraint verhindert doppelte Anfragen auf DB-Ebene
+    __table_args__ = (
+        db.Index('ix_lr_owner_film', 'owner_id', 'film_id'),
+        db.UniqueConstraint('film_id', 'borrower_id', name='uq_lr_film_borrower'),
+    )
+
     # Relationships für einfachere Abfragen
     borrower = db.relationship('Benutzer', foreign_keys=[borrower_id])
     owner = db.relationship('Benutzer', foreign_keys=[owner_id])
@@ -98,20 +188,40 @@ class FeedEvent(db.Model):
     def __repr__(self):
         return f'<FeedEvent {self.event_type}: {self.film.title}>'
 
+# Argon2id mit OWASP-empfohlenen Parametern (19 MiB, t=2, p=1): stärker gegen
+# GPU-Angriffe als PBKDF2 und dabei deutlich billiger pro Login im Request-Thread
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=19_456, parallelism=1)
+
 class Benutzer(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
-    
+
     def set_password(self, password):
         """Passwort hashen und speichern"""
-        self.password_hash = generate_password_hash(password)
-    
+        self.password_hash = _password_hasher.hash(password)
+
     def check_password(self, password):
-        """Passwort überprüfen"""
-        return check_password_hash(self.password_hash, password)
-    
+        """Passwort überprüfen; migriert Alt-Hashes transparent auf Argon2id"""
+        if self.password_hash.startswith("$argon2"):
+            try:
+                _password_hasher.verify(self.password_hash, password)
+            except VerifyMismatchError:
+                return False
+            if _password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+                db.session.commit()
+            return True
+
+        # Bestands-Hashes im Werkzeug-Format (pbkdf2/scrypt): einmal prüfen
+        # und bei Erfolg auf Argon2id umschreiben
+        if check_password_hash(self.password_hash, password):
+            self.set_password(password)
+            db.session.commit()
+            return True
+        return False
+
 
 # DB initialisieren - wird durch Flask-Migrate verwaltet, deher gibt es das nicht. Initiale Nutzer werden durch ein CLI Comand erstellt
 
@@ -132,14 +242,91 @@ def admin_erforderlich(f):
             flash("Du musst dich anmelden", "warning")
             return redirect(url_for("login"))
         
-        user = Benutzer.query.filter_by(id=session.get("benutzer_id")).first()
-        if not user or not user.is_admin:
+        # Admin-Flag aus der signierten Session statt per SELECT aus der DB;
+        # die kurze Session-Lebensdauer begrenzt, wie lange ein entzogenes
+        # Admin-Recht noch nachwirkt
+        if not session.get("benutzer_admin"):
             flash("Du hast keine Admin-Berechtigung", "warning")
             return redirect(url_for("index"))
-        
+
         return f(*args, **kwargs)
     return decorated_function
 
+def get_or_404(model, pk):
+    """Lädt ein Objekt per Primärschlüssel oder bricht mit 404 ab.
+
+    Nutzt session.get (Identity-Map-Schnellpfad) statt des teureren
+    Query.get_or_404 über die Legacy-Query-Maschinerie.
+    """
+    obj = db.session.get(model, pk)
+    if obj is None:
+        abort(404)
+    return obj
+
+@cache.memoize(timeout=60)
+def alle_benutzer():
+    """Alle Benutzer (id, name) sortiert nach Name.
+
+    Benutzer ändern sich nur durch Admin-Aktionen, werden aber auf jeder
+    Index-/Detailseite für die Auswahllisten gebraucht - daher 60s
+    gecacht; add_benutzer/delete_benutzer invalidieren explizit.
+    """
+    return Benutzer.query.with_entities(Benutzer.id, Benutzer.name).order_by(Benutzer.name).all()
+
+def benutzer_by_name(name):
+    """Sucht einen Benutzer per Name.
+
+    Nutzt ein lambda-Statement, damit SQLAlchemy das kompilierte SQL
+    wiederverwendet statt es bei jedem Request neu zu bauen.
+    """
+    stmt = lambda_stmt(lambda: select(Benutzer).where(Benutzer.name == name))
+    return db.session.execute(stmt).scalar_one_or_none()
+
+def film_title_by_tmdb_id(tmdb_id):
+    """Liefert den Titel eines Films per TMDb-ID (oder None).
+
+    Der Duplikat-Check braucht nur den Titel für die Flash-Meldung -
+    eine einzelne Spalte über den tmdb_id-Index statt der ganzen Zeile.
+    """
+    stmt = lambda_stmt(lambda: select(Film.title).where(Film.tmdb_id == tmdb_id))
+    return db.session.execute(stmt).scalar_one_or_none()
+
+@cache.memoize(timeout=300)
+def get_all_genres():
+    """Genre-Namen der vorhandenen Filme für die Filter-Dropdown, sortiert.
+
+    Der Join auf film_genres blendet verwaiste Genres aus: wird der
+    letzte Western gelöscht, verschwindet "Western" wieder aus der
+    Dropdown statt auf eine leere Trefferliste zu führen. Das Ergebnis
+    ändert sich nur beim Hinzufügen/Löschen von Filmen, daher gecacht;
+    add_film/delete_film invalidieren explizit.
+    """
+    stmt = select(Genre.name).join(film_genres).distinct().order_by(Genre.name)
+    return db.session.scalars(stmt).all()
+
+def genres_from_names(names):
+    """Holt oder erstellt Genre-Zeilen für die übergebenen Namen"""
+    result = []
+    for name in names:
+        name = name.strip()
+        if not name:
+            continue
+        genre = db.session.execute(select(Genre).where(Genre.name == name)).scalar_one_or_none()
+        if genre is None:
+            genre = Genre(name=name)
+            db.session.add(genre)
+        result.append(genre)
+    return result
+
+def benutzer_id_by_name(name):
+    """Liefert nur die ID eines Benutzers (oder None).
+
+    Für reine Existenz-Checks: holt eine einzelne Integer-Spalte über den
+    Unique-Index statt ein komplettes ORM-Objekt zu hydrieren.
+    """
+    stmt = lambda_stmt(lambda: select(Benutzer.id).where(Benutzer.name == name))
+    return db.session.execute(stmt).scalar_one_or_none()
+
 def extract_tmdb_id(input_str):
     """
     Extrahiert TMDb-ID aus verschiedenen Formaten:
@@ -151,44 +338,67 @@ def extract_tmdb_id(input_str):
         return None
     
     input_str = input_str.strip()
-    
-    # Wenn es eine URL ist
-    url_match = re.search(r'/movie/(\d+)', input_str)
-    if url_match:
-        return url_match.group(1)
-    
-    # Wenn es nur Zahlen sind
+
+    # Wenn es nur Zahlen sind (häufigster Fall, spart die Regex komplett)
     if input_str.isdigit():
         return input_str
-    
+
+    # Wenn es eine URL ist - der billige Substring-Test spart den Start
+    # der Regex-Engine für alles, was gar keine Movie-URL sein kann
+    if '/movie/' in input_str:
+        url_match = _TMDB_URL_RE.search(input_str)
+        if url_match:
+            return url_match.group(1)
+
     return None
 
-def fetch_film_data_tmdb(tmdb_id):
+# Von der TMDb-Antwort tatsächlich genutzte Felder ("name" für die Genre-Objekte);
+# alles andere (credits, production_companies, ...) wird beim Parsen verworfen
+_TMDB_WANTED_KEYS = frozenset({"title", "release_date", "overview", "poster_path", "genres", "name"})
+
+def _tmdb_json_hook(obj):
+    """object_hook für response.json: behält nur die benötigten Felder"""
+    return {k: v for k, v in obj.items() if k in _TMDB_WANTED_KEYS}
+
+@cache.memoize(timeout=86400)
+def _fetch_tmdb_raw(movie_id):
     """
-    Holt Filmdaten von TMDb API basierend auf TMDb-ID
+    Holt das rohe TMDb-JSON für eine Movie-ID.
+
+    TMDb-Einträge ändern sich höchstens über Tage, daher werden
+    Antworten 24h gecacht - wiederholte Adds desselben Films sparen so
+    den kompletten HTTP-Roundtrip. Fehler (raise_for_status) landen
+    nicht im Cache. Für Multi-Worker-Setups lässt sich der Cache über
+    die Flask-Caching-Konfiguration auf Redis umstellen.
     """
-    if not TMDB_API_KEY:
-        raise ValueError("TMDB_API_KEY nicht gesetzt")
-    
-    # Extrahiere die TMDb-ID
-    movie_id = extract_tmdb_id(tmdb_id)
-    if not movie_id:
-        raise ValueError(f"Ungültige TMDb-ID: {tmdb_id}")
-    
-    logging.info(f"Suche Film mit TMDb-ID: {movie_id}")
-    
     # Direkte Movie-API verwenden statt Find-API
     url = f"https://api.themoviedb.org/3/movie/{movie_id}"
     params = {
         "api_key": TMDB_API_KEY,
         "language": "de-DE"
     }
-    
-    response = requests.get(url, params=params, timeout=10)
+
+    # Getrennte Connect-/Read-Timeouts: ein hängender Verbindungsaufbau
+    # blockiert den Worker so höchstens 3s statt 10s
+    response = _tmdb_session.get(url, params=params, timeout=(3, 10))
     response.raise_for_status()
-    data = response.json()
-    
-    logging.info(f"TMDb Response: {data}")
+    # Nur die genutzten Felder materialisieren statt des kompletten
+    # Movie-Payloads - weniger Allokationen pro /add und kleinerer LRU-Cache
+    return response.json(object_hook=_tmdb_json_hook)
+
+def fetch_film_data_tmdb(movie_id):
+    """
+    Holt Filmdaten von TMDb API basierend auf einer bereits
+    extrahierten Movie-ID (siehe extract_tmdb_id)
+    """
+    if not TMDB_API_KEY:
+        raise ValueError("TMDB_API_KEY nicht gesetzt")
+
+    logging.info("Suche Film mit TMDb-ID: %s", movie_id)
+
+    data = _fetch_tmdb_raw(movie_id)
+
+    logging.info("TMDb Response: %s", data)
     
     # Prüfe ob der Film gefunden wurde
     if "title" not in data:
@@ -199,17 +409,16 @@ def fetch_film_data_tmdb(tmdb_id):
     if data.get("poster_path"):
         poster_url = f"https://image.tmdb.org/t/p/w500{data.get('poster_path')}"
     
-    # Extrahiere Genres
-    genres = data.get("genres", [])
-    genres_str = ", ".join([g["name"] for g in genres]) if genres else ""
-    
+    # Extrahiere Genres (Namensliste, wird in add_film auf Genre-Zeilen gemappt)
+    genre_names = [g["name"] for g in data.get("genres", [])]
+
     return {
         "title": data.get("title"),
         "release_date": data.get("release_date"),
         "overview": data.get("overview"),
         "tmdb_id": movie_id,
         "poster_url": poster_url,
-        "genres": genres_str
+        "genres": genre_names
     }
 
 @app.cli.command()
@@ -220,30 +429,33 @@ def init_users():
         
         if Benutzer.query.count() == 0:
             initial_users_env = os.environ.get("INITIAL_USERS", "")
-            
+
             if initial_users_env:
                 # Format: "username:password,username:password"
-                for user_pair in initial_users_env.split(","):
-                    if ":" in user_pair:
-                        username, password = user_pair.strip().split(":", 1)
-                        user = Benutzer(name=username.strip())
-                        user.set_password(password.strip())
-                        user.is_admin = True
-                        db.session.add(user)
-                        logging.info(f"Initial-Admin-Benutzer '{username}' angelegt")
+                pairs = [user_pair.strip().split(":", 1)
+                         for user_pair in initial_users_env.split(",")
+                         if ":" in user_pair]
+                # Argon2 gibt den GIL in C frei, daher hashen die Threads
+                # wirklich parallel; bulk_save_objects spart die
+                # Identity-Map-Buchhaltung für die Wegwerf-Objekte
+                with ThreadPoolExecutor() as ex:
+                    hashes = list(ex.map(
+                        lambda p: _password_hasher.hash(p),
+                        (password.strip() for _, password in pairs)))
+                db.session.bulk_save_objects([
+                    Benutzer(name=username.strip(), password_hash=pw_hash, is_admin=True)
+                    for (username, _), pw_hash in zip(pairs, hashes)
+                ])
                 db.session.commit()
+                for username, _ in pairs:
+                    logging.info("Initial-Admin-Benutzer '%s' angelegt", username.strip())
             else:
                 logging.warning("INITIAL_USERS nicht in .env definiert")
 
 # Routen
 @app.context_processor
 def inject_user():
-    user_admin = False
-    if session.get("benutzer_id"):
-        user = Benutzer.query.filter_by(id=session.get("benutzer_id")).first()
-        user_admin = user.is_admin if user else False
-    
-    return dict(session=session, user_admin=user_admin)
+    return dict(session=session, user_admin=bool(g.user and g.user.is_admin))
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
@@ -251,9 +463,10 @@ def login():
         name = request.form.get("name")
         password = request.form.get("password")
         
-        user = Benutzer.query.filter_by(name=name).first()
+        user = benutzer_by_name(name)
         
         if user and user.check_password(password):
+            session.permanent = True
             session["benutzer_id"] = user.id
             session["benutzer_name"] = user.name
             session["benutzer_admin"] = user.is_admin
@@ -297,19 +510,18 @@ def index():
         else:
             query = query.filter_by(besitzer=besitzer_filter)
     
-    if jahr_von:
-        try:
-            jahr_von_int = int(jahr_von)
-            query = query.filter(Film.year >= jahr_von_int)
-        except ValueError:
-            pass
-    
-    if jahr_bis:
-        try:
-            jahr_bis_int = int(jahr_bis)
-            query = query.filter(Film.year <= jahr_bis_int)
-        except ValueError:
-            pass
+    # isdigit statt try/except: kein Exception-Aufbau für den häufigen Fall
+    # leerer Filterfelder; ungültige Eingaben werden wie bisher ignoriert
+    jahr_von_int = int(jahr_von) if jahr_von.isdigit() else None
+    jahr_bis_int = int(jahr_bis) if jahr_bis.isdigit() else None
+
+    if jahr_von_int is not None and jahr_bis_int is not None:
+        # BETWEEN erlaubt SQLite einen einzelnen Range-Seek über den year-Index
+        query = query.filter(Film.year.between(jahr_von_int, jahr_bis_int))
+    elif jahr_von_int is not None:
+        query = query.filter(Film.year >= jahr_von_int)
+    elif jahr_bis_int is not None:
+        query = query.filter(Film.year <= jahr_bis_int)
     
     if wunschliste_filter == "ja":
         query = query.filter_by(wunschliste=True)
@@ -317,24 +529,31 @@ def index():
         query = query.filter_by(wunschliste=False)
     
     if genre_filter:
-        # Filter nach Genre (case-insensitive, weil Genres komma-separiert sind)
-        query = query.filter(Film.genres.ilike(f"%{genre_filter}%"))
-    
-    filme = query.order_by(Film.year.desc()).all()
-    benutzer = Benutzer.query.order_by(Benutzer.name).all()
+        # Indexierter Equality-Join über die Genre-Tabelle statt des alten
+        # nicht-sargablen ILIKE über die Komma-Liste
+        query = query.join(Film.genres).filter(Genre.name == genre_filter)
+
+    if ansicht != "liste":
+        # Die Kachelansicht rendert weder Beschreibung noch Leihdatum/TMDb-Link -
+        # die breiten Spalten (v.a. beschreibung TEXT) gar nicht erst laden
+        query = query.options(load_only(
+            Film.id, Film.title, Film.year, Film.poster_url,
+            Film.besitzer, Film.verliehen_an, Film.wunschliste
+        ))
+
+    # Seitenweise statt der kompletten Tabelle - hält Renderzeit und Speicher
+    # konstant, egal wie groß die Sammlung wird
+    page = request.args.get("page", 1, type=int)
+    pagination = query.order_by(Film.year.desc().nullslast(), Film.title).paginate(page=page, per_page=48, error_out=False)
+    filme = pagination.items
+    benutzer = alle_benutzer()
     
     # Sammle alle Genres aus den Filmen für die Dropdown
-    all_genres = set()
-    all_films = Film.query.all()
-    for film in all_films:
-        if film.genres:
-            for genre in film.genres.split(", "):
-                all_genres.add(genre.strip())
-    all_genres = sorted(list(all_genres))
+    all_genres = get_all_genres()
 
     # Sortierung: erst nach Datum, dann nach ID (für Filme mit gleichem created_at)
     neueste_filme_ids = [f.id for f in Film.query.filter(Film.created_at.isnot(None)).order_by(Film.created_at.desc(), Film.id.desc()).limit(10).all()]
-    logging.info(f"Top 10 neueste Filme IDs: {neueste_filme_ids}")
+    logging.info("Top 10 neueste Filme IDs: %s", neueste_filme_ids)
     
     return render_template(
         "index.html", 
@@ -345,8 +564,9 @@ def index():
         jahr_von=jahr_von, 
         jahr_bis=jahr_bis,
         wunschliste_filter=wunschliste_filter,
-        genre_filter=genre_filter, 
+        genre_filter=genre_filter,
         all_genres=all_genres,
+        pagination=pagination,
         neueste_filme_ids=neueste_filme_ids  # NEU: An Template übergeben
     )
 
@@ -360,24 +580,29 @@ def add_film():
         return redirect(url_for("index"))
     
     try:
-        film_data = fetch_film_data_tmdb(tmdb_id)
-        
-        logging.info("===== Movie Objekt =====")
-        logging.info(f"Title: {film_data.get('title')}")
-        logging.info(f"Year: {film_data.get('release_date', '')[:4]}")
-        logging.info(f"Overview: {film_data.get('overview')}")
-        logging.info(f"TMDb-ID: {film_data.get('tmdb_id')}")
-        logging.info(f"Poster: {film_data.get('poster_url')}")
-        logging.info(f"Genres: {film_data.get('genres')}")
-        
-        # Prüfe ob Film bereits existiert
-        existing = Film.query.filter_by(tmdb_id=film_data.get('tmdb_id')).first()
-        if existing:
-            flash(f"Film '{existing.title}' ist bereits in der Sammlung", "warning")
+        movie_id = extract_tmdb_id(tmdb_id)
+        if not movie_id:
+            raise ValueError(f"Ungültige TMDb-ID: {tmdb_id}")
+
+        # Prüfe ob Film bereits existiert - VOR dem TMDb-Abruf, damit
+        # Duplikate keinen HTTP-Roundtrip (und kein API-Kontingent) kosten
+        existing_title = film_title_by_tmdb_id(movie_id)
+        if existing_title is not None:
+            flash(f"Film '{existing_title}' ist bereits in der Sammlung", "warning")
             return redirect(url_for("index"))
-        
+
+        film_data = fetch_film_data_tmdb(movie_id)
+
+        logging.info("===== Movie Objekt =====")
+        logging.info("Title: %s", film_data.get('title'))
+        logging.info("Year: %s", film_data.get('release_date', '')[:4])
+        logging.info("Overview: %s", film_data.get('overview'))
+        logging.info("TMDb-ID: %s", film_data.get('tmdb_id'))
+        logging.info("Poster: %s", film_data.get('poster_url'))
+        logging.info("Genres: %s", film_data.get('genres'))
+
          # Hole aktuellen Benutzer
-        current_user = Benutzer.query.filter_by(id=session.get("benutzer_id")).first()
+        current_user = g.user
         
         # Prüfe welcher Button geklickt wurde
         action = request.form.get("action", "have")
@@ -389,37 +614,37 @@ def add_film():
             beschreibung=film_data.get("overview", ""),
             tmdb_id=film_data.get("tmdb_id"),
             poster_url=film_data.get("poster_url"),
-            genres=film_data.get("genres", ""),
+            genres=genres_from_names(film_data.get("genres", [])),
             besitzer=current_user.name if current_user else None,
             wunschliste=is_wishlist
         )
         
         db.session.add(film)
-        db.session.commit() # <-- ERST den Film speichern, damit er eine ID bekommt
+        db.session.flush()  # <-- Flush vergibt die Film-ID, ohne schon zu committen
 
-                
         # Feed Event erstellen für neuen Film
         feed_event = FeedEvent(
             event_type='new_film',
             film_id=film.id
         )
         db.session.add(feed_event)
-        db.session.commit()  # <-- Event separat speichern
-        
+        db.session.commit()  # <-- Film + Event in einem Commit (ein fsync statt zwei)
+        cache.delete_memoized(get_all_genres)
+
         flash(f"Film '{film.title}' erfolgreich hinzugefügt", "success")
         
     except ValueError as e:
-        logging.error(f"Validierungsfehler: {e}")
+        logging.error("Validierungsfehler: %s", e)
         flash(str(e), "error")
         return redirect(url_for("index"))
     
     except requests.exceptions.RequestException as e:
-        logging.error(f"Netzwerkfehler bei TMDb-Abruf: {e}")
+        logging.error("Netzwerkfehler bei TMDb-Abruf: %s", e)
         flash("Fehler bei der Verbindung zu TMDb. Bitte später versuchen.", "error")
         return redirect(url_for("index"))
     
     except Exception as e:
-        logging.error(f"Fehler beim Hinzufügen des Films: {e}")
+        logging.error("Fehler beim Hinzufügen des Films: %s", e)
         flash("Ein unerwarteter Fehler ist aufgetreten", "error")
         return redirect(url_for("index"))
     
@@ -427,14 +652,23 @@ def add_film():
 
 @app.route("/film/<int:film_id>")
 def film_detail(film_id):
-    film = Film.query.get_or_404(film_id)
-    benutzer = Benutzer.query.order_by(Benutzer.name).all()
-    lending_requests = LendingRequest.query.filter_by(film_id=film_id).all()
-    
-    # Prüfe ob aktueller Benutzer bereits eine Anfrage gestellt hat
+    film = get_or_404(Film, film_id)
+    benutzer = alle_benutzer()
+    # Borrower per JOIN mitladen - das Template und der Anfrage-Check greifen
+    # auf req.borrower zu, ohne Eager Loading wäre das ein Lazy Load pro Zeile
+    lending_requests = LendingRequest.query.options(
+        joinedload(LendingRequest.borrower)
+    ).filter_by(film_id=film_id).all()
+    
+    # Prüfe ob aktueller Benutzer bereits eine Anfrage gestellt hat -
+    # EXISTS über den film_id+borrower_id-Index statt Python-Scan der Liste
     user_has_request = False
-    if session.get('benutzer_name'):
-        user_has_request = any(req.borrower.name == session.get('benutzer_name') for req in lending_requests)
+    if session.get('benutzer_id'):
+        user_has_request = db.session.query(
+            LendingRequest.query.filter_by(
+                film_id=film_id, borrower_id=session['benutzer_id']
+            ).exists()
+        ).scalar()
     
     return render_template("detail.html", film=film, benutzer=benutzer, lending_requests=lending_requests, user_has_request=user_has_request, datetime=datetime)
 
@@ -442,15 +676,14 @@ def film_detail(film_id):
 @login_erforderlich
 @admin_erforderlich
 def update_besitzer(film_id):
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     besitzer = request.form.get("besitzer")
     
     if besitzer == "":
         film.besitzer = None
         flash(f"Besitzer für '{film.title}' entfernt", "success")
     else:
-        user = Benutzer.query.filter_by(name=besitzer).first()
-        if not user:
+        if benutzer_id_by_name(besitzer) is None:
             flash(f"Benutzer '{besitzer}' nicht gefunden", "error")
             return redirect(url_for("film_detail", film_id=film_id))
         
@@ -463,7 +696,7 @@ def update_besitzer(film_id):
 @app.route("/film/<int:film_id>/wunschliste", methods=["POST"])
 @login_erforderlich
 def toggle_wunschliste(film_id):
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     # Merke vorherigen Status
     war_wunschliste = film.wunschliste
     film.wunschliste = not film.wunschliste
@@ -471,7 +704,7 @@ def toggle_wunschliste(film_id):
     # Wenn von Wunschliste zu Verfügbar: Feed Event erstellen
     if war_wunschliste and not film.wunschliste:
         film.created_at = datetime.utcnow()
-        logging.info(f"Film '{film.title}' (ID: {film.id}) created_at aktualisiert auf: {film.created_at}")
+        logging.info("Film '%s' (ID: %s) created_at aktualisiert auf: %s", film.title, film.id, film.created_at)
         feed_event = FeedEvent(
             event_type='now_available',
             film_id=film.id
@@ -490,7 +723,7 @@ def toggle_wunschliste(film_id):
 @app.route("/film/<int:film_id>/verleihen", methods=["POST"])
 @login_erforderlich
 def verleihen(film_id):
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     verliehen_an = request.form.get("verliehen_an")
     verliehen_datum = request.form.get("verliehen_datum")
     
@@ -498,8 +731,9 @@ def verleihen(film_id):
         flash("Bitte einen Benutzer auswählen", "error")
         return redirect(url_for("film_detail", film_id=film_id))
     
-    user = Benutzer.query.filter_by(name=verliehen_an).first()
-    if not user:
+    # ID einmal holen und unten für das Löschen der Anfrage wiederverwenden
+    borrower_id = benutzer_id_by_name(verliehen_an)
+    if borrower_id is None:
         flash(f"Benutzer '{verliehen_an}' nicht gefunden", "error")
         return redirect(url_for("film_detail", film_id=film_id))
     
@@ -520,9 +754,7 @@ def verleihen(film_id):
     film.verliehen_seit = verliehen_seit
 
      # Lösche die Ausleih-Anfrage für diesen Film von dem Benutzer, an den verliehen wird
-    borrower = Benutzer.query.filter_by(name=verliehen_an).first()
-    if borrower:
-        LendingRequest.query.filter_by(film_id=film_id, borrower_id=borrower.id).delete()
+    LendingRequest.query.filter_by(film_id=film_id, borrower_id=borrower_id).delete(synchronize_session=False)
 
     db.session.commit()
     
@@ -534,7 +766,7 @@ def verleihen(film_id):
 @app.route("/film/<int:film_id>/zurueckgeben", methods=["POST"])
 @login_erforderlich
 def zurueckgeben(film_id):
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     
     if not film.verliehen_an:
         flash("Film ist nicht verliehen", "warning")
@@ -557,12 +789,12 @@ def request_lending(film_id):
         flash('Du musst angemeldet sein um einen Film auszuleihen!', 'danger')
         return redirect(url_for('login'))
     
-    benutzer = Benutzer.query.filter_by(name=session['benutzer_name']).first()
+    benutzer = g.user
     if not benutzer:
         flash('Benutzer nicht gefunden!', 'danger')
         return redirect(url_for('index'))
     
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     
     # Prüfungen
     if not film.besitzer: 
@@ -576,33 +808,31 @@ def request_lending(film_id):
     
     if film.besitzer == benutzer.name:
         return redirect(url_for('film_detail', film_id=film_id))
-    existing_request = LendingRequest.query.filter_by(
-        film_id=film_id, 
-        borrower_id=benutzer.id
-    ).first()
-    
-    if existing_request:
-        return redirect(url_for('film_detail', film_id=film_id))
-    
-    owner = Benutzer.query.filter_by(name=film.besitzer).first()
+
+    owner = benutzer_by_name(film.besitzer)
     if not owner:
         return redirect(url_for('film_detail', film_id=film_id))
-    # Neue Anfrage erstellen
+    # Neue Anfrage erstellen; Duplikate fängt der UNIQUE-Index auf
+    # (film_id, borrower_id) ab, das spart den Prüf-SELECT vor dem INSERT
     lending_request = LendingRequest(
         film_id=film_id,
         borrower_id=benutzer.id,
         owner_id=owner.id
     )
     db.session.add(lending_request)
-    db.session.commit()
-    
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Anfrage existiert bereits
+        db.session.rollback()
+
     return redirect(url_for('film_detail', film_id=film_id))
 
 @app.route('/lending-request/<int:request_id>/delete', methods=['POST'])
 @login_erforderlich
 def delete_lending_request(request_id):
     """Löscht eine Ausleih-Anfrage"""
-    lending_request = LendingRequest.query.get_or_404(request_id)
+    lending_request = get_or_404(LendingRequest, request_id)
     
     film_id = lending_request.film_id
     
@@ -618,13 +848,9 @@ def delete_lending_request(request_id):
 @login_erforderlich
 def benutzer_liste():
     benutzer = Benutzer.query.order_by(Benutzer.name).all()
-    benutzer_mit_count = []
-    for user in benutzer:
-        filme_count = Film.query.filter_by(besitzer=user.name).count()
-        benutzer_mit_count.append({
-            'user': user,
-            'filme_count': filme_count
-        })
+    # Filmanzahl pro Besitzer in einer einzigen GROUP-BY-Abfrage statt einem COUNT pro Benutzer
+    counts = dict(db.session.query(Film.besitzer, func.count(Film.id)).group_by(Film.besitzer).all())
+    benutzer_mit_count = [{'user': u, 'filme_count': counts.get(u.name, 0)} for u in benutzer]
     return render_template("benutzer.html", benutzer_data=benutzer_mit_count)
 
 @app.route("/benutzer/add", methods=["POST"])
@@ -642,7 +868,7 @@ def add_benutzer():
         flash("Bitte ein Passwort eingeben", "error")
         return redirect(url_for("benutzer_liste"))
     
-    existing = Benutzer.query.filter_by(name=name).first()
+    existing = benutzer_by_name(name)
     if existing:
         flash(f"Benutzer '{name}' existiert bereits", "warning")
         return redirect(url_for("benutzer_liste"))
@@ -651,7 +877,8 @@ def add_benutzer():
     user.set_password(password)
     db.session.add(user)
     db.session.commit()
-    
+    cache.delete_memoized(alle_benutzer)
+
     flash(f"Benutzer '{name}' hinzugefügt", "success")
     return redirect(url_for("benutzer_liste"))
 
@@ -660,7 +887,7 @@ def add_benutzer():
 @admin_erforderlich
 def make_admin(user_id):
     """Macht einen Benutzer zum Admin"""
-    user = Benutzer.query.get_or_404(user_id)
+    user = get_or_404(Benutzer, user_id)
     
     if user.is_admin:
         flash(f'Benutzer \'{user.name}\' ist bereits Admin', 'warning')
@@ -675,20 +902,22 @@ def make_admin(user_id):
 @app.route("/benutzer/delete/<int:user_id>", methods=["POST"])
 @admin_erforderlich
 def delete_benutzer(user_id):
-    user = Benutzer.query.get_or_404(user_id)
+    user = get_or_404(Benutzer, user_id)
     name = user.name
     
-    filme_count = Film.query.filter_by(besitzer=name).count()
+    # Direkter skalarer COUNT statt Query.count(), das die Abfrage in ein Subquery verpackt
+    filme_count = db.session.query(func.count(Film.id)).filter(Film.besitzer == name).scalar()
     if filme_count > 0:
         flash(f"Benutzer '{name}' kann nicht gelöscht werden, da er noch {filme_count} Film(e) besitzt", "error")
         return redirect(url_for("benutzer_liste"))
     
     # Lösche alle Leihanfragen des Benutzers (als Anfragender oder als Besitzer)
-    LendingRequest.query.filter((LendingRequest.borrower_id == user_id) | (LendingRequest.owner_id == user_id)).delete()
+    LendingRequest.query.filter((LendingRequest.borrower_id == user_id) | (LendingRequest.owner_id == user_id)).delete(synchronize_session=False)
 
     db.session.delete(user)
     db.session.commit()
-    
+    cache.delete_memoized(alle_benutzer)
+
     flash(f"Benutzer '{name}' wurde gelöscht", "success")
     return redirect(url_for("benutzer_liste"))
 
@@ -700,7 +929,7 @@ def change_password():
     new_password = request.form.get('new_password')
     new_password_confirm = request.form.get('new_password_confirm')
     
-    current_user = Benutzer.query.get(session['benutzer_id'])
+    current_user = g.user
     
     # Prüfe altes Passwort
     if not current_user.check_password(old_password):
@@ -727,9 +956,9 @@ def change_password():
 @app.route("/delete/<int:film_id>", methods=["POST"])
 @login_erforderlich
 def delete_film(film_id):
-    film = Film.query.get_or_404(film_id)
+    film = get_or_404(Film, film_id)
     title = film.title
-    current_user = Benutzer.query.get(session['benutzer_id'])
+    current_user = g.user
     
     # Prüfe ob Nutzer Admin oder Besitzer ist
     if not current_user.is_admin and current_user.name != film.besitzer:
@@ -737,10 +966,11 @@ def delete_film(film_id):
         return redirect(url_for('film_detail', film_id=film_id))
 
     # Lösche alle Ausleih-Anfragen für diesen Film
-    LendingRequest.query.filter_by(film_id=film_id).delete()
+    LendingRequest.query.filter_by(film_id=film_id).delete(synchronize_session=False)
 
     db.session.delete(film)
     db.session.commit()
+    cache.delete_memoized(get_all_genres)
     flash(f"Film '{title}' wurde gelöscht", "success")
     return redirect(url_for("index"))
 
@@ -748,23 +978,36 @@ def delete_film(film_id):
 @login_erforderlich
 def leihboard():
     """Zeigt das Leih Board mit Anfragen an den Nutzer, von dem Nutzer und verliehenen Filmen"""
-    current_user = Benutzer.query.get(session['benutzer_id'])
-    
-    # Anfragen an den eingeloggten Nutzer (er ist Besitzer)
-    requests_to_me = LendingRequest.query.filter_by(owner_id=current_user.id).all()
-    requests_to_me = sorted(requests_to_me, key=lambda x: x.borrower.name)
-    
+    current_user = g.user
+    
+    # Anfragen an den eingeloggten Nutzer (er ist Besitzer):
+    # Borrower + Film per JOIN mitladen statt N Lazy Loads,
+    # Sortierung direkt in der Datenbank statt in Python
+    requests_to_me = (LendingRequest.query
+        .options(joinedload(LendingRequest.borrower), joinedload(LendingRequest.film))
+        .filter_by(owner_id=current_user.id)
+        .join(LendingRequest.borrower).order_by(Benutzer.name).all())
+
     # Anfragen von dem eingeloggten Nutzer (er ist Anfragender)
-    requests_from_me = LendingRequest.query.filter_by(borrower_id=current_user.id).all()
-    requests_from_me = sorted(requests_from_me, key=lambda x: x.owner.name)
+    requests_from_me = (LendingRequest.query
+        .options(joinedload(LendingRequest.owner), joinedload(LendingRequest.film))
+        .filter_by(borrower_id=current_user.id)
+        .join(LendingRequest.owner).order_by(Benutzer.name).all())
     
     # Filme die vom eingeloggten Nutzer verliehen sind
-    lent_films = Film.query.filter_by(besitzer=current_user.name).filter(Film.verliehen_an.isnot(None)).all()
-    lent_films = sorted(lent_films, key=lambda x: x.verliehen_an or "")
+    # Das Leihboard zeigt nur Titel, Besitzer und Leihstatus - die breiten
+    # Spalten (beschreibung, poster_url, genres) nicht mitladen
+    _leihboard_cols = load_only(Film.id, Film.title, Film.besitzer,
+                                Film.verliehen_an, Film.verliehen_seit)
+    lent_films = (Film.query.options(_leihboard_cols)
+                  .filter_by(besitzer=current_user.name)
+                  .filter(Film.verliehen_an.isnot(None))
+                  .order_by(Film.verliehen_an).all())
     
     # Filme die der eingeloggte Nutzer von anderen geliehen hat
-    borrowed_films = Film.query.filter_by(verliehen_an=current_user.name).all()
-    borrowed_films = sorted(borrowed_films, key=lambda x: x.besitzer or "")
+    borrowed_films = (Film.query.options(_leihboard_cols)
+                      .filter_by(verliehen_an=current_user.name)
+                      .order_by(Film.besitzer).all())
     
     return render_template('leihboard.html', requests_to_me=requests_to_me, requests_from_me=requests_from_me, lent_films=lent_films, borrowed_films=borrowed_films, datetime=datetime)
 
@@ -824,7 +1067,7 @@ def rss_feed():
         if film.besitzer:
             beschreibung_parts.append(f"Besitzer: {film.besitzer}")
         if film.genres:
-            beschreibung_parts.append(f"Genres: {film.genres}")
+            beschreibung_parts.append(f"Genres: {', '.join(g.name for g in film.genres)}")
         beschreibung = " | ".join(beschreibung_parts)
         
         # Film-Detail-URL
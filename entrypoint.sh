@@ -13,4 +13,6 @@ echo "Starting Gunicorn..."
 echo "App running at: http://localhost:5000"
 echo "================================"
 echo ""
-exec python -m gunicorn --bind 0.0.0.0:5000 app:app
\ No newline at end of file
+# 4 Worker mit je 8 Threads: parallele Requests statt des
+# single-threaded Gunicorn-Defaults (1 Sync-Worker)
+exec python -m gunicorn --bind 0.0.0.0:5000 -w 4 -k gthread --threads 8 app:app
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""Add indexes for Film filters
+
+Revision ID: a41c7d9e52f0
+Revises: 3b7e9f3362b7
+Create Date: 2026-08-29 10:12:44.102933
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c7d9e52f0'
+down_revision = '3b7e9f3362b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_film_besitzer'), ['besitzer'], unique=False)
+        batch_op.create_index(batch_op.f('ix_film_tmdb_id'), ['tmdb_id'], unique=True)
+        batch_op.create_index(batch_op.f('ix_film_year'), ['year'], unique=False)
+        batch_op.create_index('ix_film_besitzer_year', ['besitzer', 'year'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.drop_index('ix_film_besitzer_year')
+        batch_op.drop_index(batch_op.f('ix_film_year'))
+        batch_op.drop_index(batch_op.f('ix_film_tmdb_id'))
+        batch_op.drop_index(batch_op.f('ix_film_besitzer'))
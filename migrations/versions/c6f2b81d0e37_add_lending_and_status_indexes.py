@@ -0,0 +1,40 @@
+"""Add lending and status indexes
+
+Revision ID: c6f2b81d0e37
+Revises: a41c7d9e52f0
+Create Date: 2026-08-29 11:03:17.481265
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2b81d0e37'
+down_revision = 'a41c7d9e52f0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_film_verliehen_an'), ['verliehen_an'], unique=False)
+        batch_op.create_index(batch_op.f('ix_film_wunschliste'), ['wunschliste'], unique=False)
+
+    with op.batch_alter_table('lending_request', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_lending_request_borrower_id'), ['borrower_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_lending_request_film_id'), ['film_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_lending_request_owner_id'), ['owner_id'], unique=False)
+        batch_op.create_index('ix_lr_owner_film', ['owner_id', 'film_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('lending_request', schema=None) as batch_op:
+        batch_op.drop_index('ix_lr_owner_film')
+        batch_op.drop_index(batch_op.f('ix_lending_request_owner_id'))
+        batch_op.drop_index(batch_op.f('ix_lending_request_film_id'))
+        batch_op.drop_index(batch_op.f('ix_lending_request_borrower_id'))
+
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_film_wunschliste'))
+        batch_op.drop_index(batch_op.f('ix_film_verliehen_an'))
@@ -0,0 +1,87 @@
+"""Normalize genres into own table
+
+Revision ID: e93a5c07b214
+Revises: c6f2b81d0e37
+Create Date: 2026-08-29 11:41:02.774210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93a5c07b214'
+down_revision = 'c6f2b81d0e37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('genre',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('genre', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_genre_name'), ['name'], unique=True)
+
+    op.create_table('film_genres',
+    sa.Column('film_id', sa.Integer(), nullable=False),
+    sa.Column('genre_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['film_id'], ['film.id'], ),
+    sa.ForeignKeyConstraint(['genre_id'], ['genre.id'], ),
+    sa.PrimaryKeyConstraint('film_id', 'genre_id')
+    )
+    with op.batch_alter_table('film_genres', schema=None) as batch_op:
+        batch_op.create_index('ix_fg_genre_film', ['genre_id', 'film_id'], unique=False)
+
+    # Bestandsdaten: Komma-Liste aus film.genres in die neuen Tabellen zerlegen
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT id, genres FROM film WHERE genres IS NOT NULL AND genres <> ''"
+    )).fetchall()
+    genre_ids = {}
+    for film_id, csv in rows:
+        for name in sorted({g.strip() for g in csv.split(',') if g.strip()}):
+            genre_id = genre_ids.get(name)
+            if genre_id is None:
+                genre_id = conn.execute(
+                    sa.text("INSERT INTO genre (name) VALUES (:name) RETURNING id"),
+                    {"name": name},
+                ).scalar()
+                genre_ids[name] = genre_id
+            conn.execute(
+                sa.text("INSERT INTO film_genres (film_id, genre_id) VALUES (:f, :g)"),
+                {"f": film_id, "g": genre_id},
+            )
+
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.drop_column('genres')
+
+
+def downgrade():
+    with op.batch_alter_table('film', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('genres', sa.String(length=500), nullable=True))
+
+    # Genres pro Film wieder zu einer Komma-Liste zusammensetzen
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(
+        "SELECT fg.film_id, g.name FROM film_genres fg"
+        " JOIN genre g ON g.id = fg.genre_id ORDER BY fg.film_id, g.name"
+    )).fetchall()
+    by_film = {}
+    for film_id, name in rows:
+        by_film.setdefault(film_id, []).append(name)
+    for film_id, names in by_film.items():
+        conn.execute(
+            sa.text("UPDATE film SET genres = :g WHERE id = :f"),
+            {"g": ", ".join(names), "f": film_id},
+        )
+
+    with op.batch_alter_table('film_genres', schema=None) as batch_op:
+        batch_op.drop_index('ix_fg_genre_film')
+    op.drop_table('film_genres')
+
+    with op.batch_alter_table('genre', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_genre_name'))
+    op.drop_table('genre')